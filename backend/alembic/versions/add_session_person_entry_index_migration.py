@@ -0,0 +1,28 @@
+"""Add composite index on person_sessions (person_id, entry_time)
+
+Revision ID: add_session_person_entry_index
+Revises: derive_entry_exit_flags
+Create Date: 2026-08-29 13:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_session_person_entry_index'
+down_revision = 'derive_entry_exit_flags'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Dwell analytics group by person over entry-time ranges; this turns
+    # those scans into index range lookups. camera_events already carries
+    # idx_person_camera_timestamp for the event-side queries.
+    op.create_index('idx_sessions_person_entry', 'person_sessions',
+                    ['person_id', 'entry_time'])
+
+
+def downgrade():
+    op.drop_index('idx_sessions_person_entry', table_name='person_sessions')
@@ -0,0 +1,38 @@
+"""Store analytics_cache payloads as compressed binary
+
+Revision ID: compress_cache_payload
+Revises: make_cache_expiry_strict
+Create Date: 2026-08-29 12:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'compress_cache_payload'
+down_revision = 'make_cache_expiry_strict'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Existing rows hold uncompressed JSON text; the table is a cache, so
+    # dropping them is cheaper than rewriting every payload in place.
+    op.execute("DELETE FROM analytics_cache")
+
+    op.alter_column('analytics_cache', 'metric_data',
+                    existing_type=sa.Text(),
+                    type_=sa.LargeBinary(),
+                    nullable=False,
+                    postgresql_using='metric_data::bytea')
+
+
+def downgrade():
+    op.execute("DELETE FROM analytics_cache")
+
+    op.alter_column('analytics_cache', 'metric_data',
+                    existing_type=sa.LargeBinary(),
+                    type_=sa.Text(),
+                    nullable=False,
+                    postgresql_using="convert_from(metric_data, 'UTF8')")
@@ -0,0 +1,50 @@
+"""Derive is_entry/is_exit from event_type as generated columns
+
+Revision ID: derive_entry_exit_flags
+Revises: compress_cache_payload
+Create Date: 2026-08-29 13:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'derive_entry_exit_flags'
+down_revision = 'compress_cache_payload'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # The flags are trivially derivable from event_type; storing them cost
+    # write bandwidth on every ingested row. Recreate them as generated
+    # columns so existing readers and indexes keep working.
+    op.drop_index('ix_camera_events_is_entry', table_name='camera_events')
+    op.drop_index('ix_camera_events_is_exit', table_name='camera_events')
+    op.drop_column('camera_events', 'is_entry')
+    op.drop_column('camera_events', 'is_exit')
+
+    op.add_column('camera_events', sa.Column(
+        'is_entry', sa.Boolean(),
+        sa.Computed("event_type = 'entry'")))
+    op.add_column('camera_events', sa.Column(
+        'is_exit', sa.Boolean(),
+        sa.Computed("event_type = 'exit'")))
+
+    op.create_index('ix_camera_events_is_entry', 'camera_events', ['is_entry'])
+    op.create_index('ix_camera_events_is_exit', 'camera_events', ['is_exit'])
+
+
+def downgrade():
+    op.drop_index('ix_camera_events_is_entry', table_name='camera_events')
+    op.drop_index('ix_camera_events_is_exit', table_name='camera_events')
+    op.drop_column('camera_events', 'is_entry')
+    op.drop_column('camera_events', 'is_exit')
+
+    op.add_column('camera_events', sa.Column('is_entry', sa.Boolean(), nullable=True))
+    op.add_column('camera_events', sa.Column('is_exit', sa.Boolean(), nullable=True))
+    op.execute("UPDATE camera_events SET is_entry = (event_type = 'entry'), is_exit = (event_type = 'exit')")
+
+    op.create_index('ix_camera_events_is_entry', 'camera_events', ['is_entry'])
+    op.create_index('ix_camera_events_is_exit', 'camera_events', ['is_exit'])
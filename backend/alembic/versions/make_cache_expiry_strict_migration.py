@@ -0,0 +1,40 @@
+"""Make analytics_cache expiry strict and index cache lookups
+
+Revision ID: make_cache_expiry_strict
+Revises: add_camera_group_column
+Create Date: 2026-08-29 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'make_cache_expiry_strict'
+down_revision = 'add_camera_group_column'
+branch_labels = None
+depends_on = None
+
+# Far-future sentinel for rows that previously used NULL = "never expires"
+FAR_FUTURE = "'9999-12-31 00:00:00'"
+
+
+def upgrade():
+    # Backfill NULL expiries with a far-future sentinel before tightening
+    op.execute(f"UPDATE analytics_cache SET expires_at = {FAR_FUTURE} WHERE expires_at IS NULL")
+
+    op.alter_column('analytics_cache', 'expires_at',
+                    existing_type=sa.DateTime(timezone=True),
+                    nullable=False)
+
+    # Covering index so lookups become an index range scan on (cache_key, expires_at)
+    op.create_index('ix_cache_key_expires', 'analytics_cache',
+                    ['cache_key', 'expires_at'])
+
+
+def downgrade():
+    op.drop_index('ix_cache_key_expires', 'analytics_cache')
+
+    op.alter_column('analytics_cache', 'expires_at',
+                    existing_type=sa.DateTime(timezone=True),
+                    nullable=True)
@@ -7,7 +7,7 @@ from datetime import timedelta
 
 from ..core.database import get_db
 from ..models.user import User
-from ..services.auth_service import AuthService
+from ..services.auth_service import AuthService, invalidate_user_cache
 
 router = APIRouter(prefix="/api/v1/auth", tags=["authentication"])
 
@@ -76,7 +76,8 @@ async def register(user_data: UserCreate, db: Session = Depends(get_db)):
     db.add(db_user)
     db.commit()
     db.refresh(db_user)
-    
+    invalidate_user_cache(db_user.username)
+
     return UserResponse(
         id=db_user.id,
         username=db_user.username,
@@ -1,6 +1,8 @@
+import asyncio
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from .core.config import settings
+from .core.database import SessionLocal
 from .api import auth
 from .api.analytics import router as analytics_router
 
@@ -22,6 +24,29 @@ app.add_middleware(
 app.include_router(auth.router)
 app.include_router(analytics_router)
 
+@app.on_event("startup")
+async def start_cache_purge_task():
+    """Periodically delete expired analytics cache rows"""
+    from .services.analytics_service import AnalyticsService
+
+    def purge_once():
+        db = SessionLocal()
+        try:
+            AnalyticsService(db).purge_expired_cache()
+        finally:
+            db.close()
+
+    async def purge_loop():
+        while True:
+            await asyncio.sleep(3600)
+            # Synchronous DB work goes to a worker thread so the purge
+            # never blocks the event loop
+            await asyncio.to_thread(purge_once)
+
+    # Keep a reference on app.state: asyncio only holds weak references to
+    # tasks, so an unreferenced task can be garbage-collected mid-flight
+    app.state.cache_purge_task = asyncio.create_task(purge_loop())
+
 @app.get("/")
 async def root():
     return {"message": "Dwell-Insight Analytics Platform API"}
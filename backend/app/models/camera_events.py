@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, Text, Index, BigInteger, Float
+from sqlalchemy import Column, Computed, Integer, String, DateTime, Boolean, Text, Index, BigInteger, Float, LargeBinary
 from sqlalchemy.sql import func
 from ..core.database import Base
 
@@ -68,8 +68,10 @@ class CameraEvent(Base):
     session_id = Column(String(100), nullable=True, index=True)
     dwell_duration = Column(Integer, nullable=True)  # Duration in seconds (legacy)
     dwell_time = Column(Integer, nullable=True, index=True)  # Pre-calculated dwell time in seconds
-    is_entry = Column(Boolean, nullable=True, index=True)
-    is_exit = Column(Boolean, nullable=True, index=True)
+    # Derived from event_type in the database (generated columns); never
+    # written by the ingest path
+    is_entry = Column(Boolean, Computed("event_type = 'entry'"), index=True)
+    is_exit = Column(Boolean, Computed("event_type = 'exit'"), index=True)
     
     # Camera description for analytics
     camera_description = Column(String(100), nullable=True, index=True)
@@ -124,6 +126,8 @@ class PersonSession(Base):
     __table_args__ = (
         Index('idx_person_camera_session', 'person_id', 'camera_id', 'session_id'),
         Index('idx_entry_time', 'entry_time'),
+        # Per-person date-ranged analytics scans
+        Index('idx_sessions_person_entry', 'person_id', 'entry_time'),
     )
 
 class AnalyticsCache(Base):
@@ -131,6 +135,11 @@ class AnalyticsCache(Base):
     
     id = Column(Integer, primary_key=True, index=True)
     cache_key = Column(String(255), unique=True, nullable=False, index=True)
-    metric_data = Column(Text, nullable=False)  # JSONB equivalent for SQLite compatibility
+    metric_data = Column(LargeBinary, nullable=False)  # zlib-compressed JSON payload
     calculated_at = Column(DateTime(timezone=True), server_default=func.now())
-    expires_at = Column(DateTime(timezone=True), nullable=True) 
\ No newline at end of file
+    # Strict expiry (no NULL sentinel) so lookups can use a simple range index
+    expires_at = Column(DateTime(timezone=True), nullable=False)
+
+    __table_args__ = (
+        Index('ix_cache_key_expires', 'cache_key', 'expires_at'),
+    ) 
\ No newline at end of file
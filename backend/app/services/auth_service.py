@@ -1,8 +1,14 @@
+import base64
+import calendar
+import hashlib
+import hmac
+import json
+import time
 from datetime import datetime, timedelta
-from typing import Optional
-from jose import JWTError, jwt
+from typing import Dict, Optional, Tuple
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from sqlalchemy import inspect as sa_inspect
 from sqlalchemy.orm import Session
 from ..core.database import get_db
 from ..models.user import User
@@ -13,8 +19,67 @@ SECRET_KEY = "your-secret-key-here"  # In production, use environment variable
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
+# HS256 is HMAC-SHA-256 over base64url(header).base64url(payload).
+# Signing goes straight through hmac/hashlib (OpenSSL-backed) instead of
+# python-jose's pure-Python path. OpenSSL dispatches to the SHA extensions
+# (SHA-NI) at runtime on supporting x86_64 CPUs, so no per-CPU code is
+# needed here -- just make sure we really got the OpenSSL constructor and
+# not the slow bundled fallback (which reports the same .name, so check
+# the implementing module instead).
+assert type(hashlib.sha256()).__module__ == '_hashlib', \
+    "hashlib SHA-256 is not OpenSSL-backed; HS256 signing would be slow"
+
+# Pre-encoded key and a reusable HMAC prototype: .copy() is implemented in C
+# and skips the key-expansion step of HMAC_Init_ex on every token.
+_KEY = SECRET_KEY.encode()
+_HMAC_PROTO = hmac.new(_KEY, b"", hashlib.sha256)
+
+def _sign(signing_input: bytes) -> bytes:
+    h = _HMAC_PROTO.copy()
+    h.update(signing_input)
+    return h.digest()
+_JWT_HEADER_B64 = base64.urlsafe_b64encode(
+    json.dumps({"alg": ALGORITHM, "typ": "JWT"}, separators=(',', ':')).encode()
+).rstrip(b'=')
+
+def _b64url_encode(data: bytes) -> bytes:
+    return base64.urlsafe_b64encode(data).rstrip(b'=')
+
+def _b64url_decode(data: bytes) -> bytes:
+    return base64.urlsafe_b64decode(data + b'=' * (-len(data) % 4))
+
 security = HTTPBearer()
 
+# Request-scoped user cache: skips the per-request User SQL lookup for
+# rows that rarely change. Entries expire after a short TTL. Only plain
+# column values are stored — a live ORM instance would stay bound to its
+# originating session and turn into an expired detached object as soon as
+# that session commits — and a fresh session-less User is rebuilt per hit.
+_USER_CACHE_TTL_SECONDS = 60
+_USER_CACHE_MAXSIZE = 10_000
+_USER_COLUMNS = tuple(column.key for column in sa_inspect(User).columns)
+_user_cache: Dict[str, Tuple[float, Dict]] = {}
+
+def _get_cached_user(username: str) -> Optional[User]:
+    entry = _user_cache.get(username)
+    if entry is None:
+        return None
+    expires_at, values = entry
+    if expires_at < time.monotonic():
+        _user_cache.pop(username, None)
+        return None
+    return User(**values)
+
+def _cache_user(username: str, user: User) -> None:
+    if len(_user_cache) >= _USER_CACHE_MAXSIZE:
+        _user_cache.clear()
+    values = {key: getattr(user, key) for key in _USER_COLUMNS}
+    _user_cache[username] = (time.monotonic() + _USER_CACHE_TTL_SECONDS, values)
+
+def invalidate_user_cache(username: str) -> None:
+    """Drop a cached user after account changes so stale data is not served"""
+    _user_cache.pop(username, None)
+
 class AuthService:
     def __init__(self, db: Session):
         self.db = db
@@ -35,19 +100,37 @@ class AuthService:
             expire = datetime.utcnow() + expires_delta
         else:
             expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-        to_encode.update({"exp": expire})
-        encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
-        return encoded_jwt
-    
+        # expire is a naive UTC datetime; .timestamp() would read it as local
+        # time, so convert via the UTC calendar like jose's utctimetuple path
+        to_encode.update({"exp": calendar.timegm(expire.utctimetuple())})
+
+        payload_b64 = _b64url_encode(
+            json.dumps(to_encode, separators=(',', ':')).encode()
+        )
+        signing_input = _JWT_HEADER_B64 + b'.' + payload_b64
+        signature = _sign(signing_input)
+        return (signing_input + b'.' + _b64url_encode(signature)).decode()
+
     def verify_token(self, token: str) -> Optional[str]:
         """Verify JWT token and return username"""
         try:
-            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-            username: str = payload.get("sub")
+            header_b64, payload_b64, signature_b64 = token.encode().split(b'.')
+
+            signing_input = header_b64 + b'.' + payload_b64
+            expected = _sign(signing_input)
+            if not hmac.compare_digest(expected, _b64url_decode(signature_b64)):
+                return None
+
+            payload = json.loads(_b64url_decode(payload_b64))
+            exp = payload.get("exp")
+            if exp is not None and exp < time.time():
+                return None
+
+            username = payload.get("sub")
             if username is None:
                 return None
             return username
-        except JWTError:
+        except (ValueError, KeyError):
             return None
     
     @staticmethod
@@ -65,10 +148,10 @@ class AuthService:
         if username is None:
             raise credentials_exception
         
-        user = db.query(User).filter(User.username == username).first()
+        user = _get_cached_user(username)
         if user is None:
-            raise credentials_exception
-        return user
-
-# Global auth service instance
-auth_service = AuthService(None)  # Will be initialized with db session when needed 
\ No newline at end of file
+            user = db.query(User).filter(User.username == username).first()
+            if user is None:
+                raise credentials_exception
+            _cache_user(username, user)
+        return user 
\ No newline at end of file
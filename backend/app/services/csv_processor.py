@@ -1,29 +1,67 @@
 import pandas as pd
+import numpy as np
+import io
 import logging
+import os
+import secrets
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from typing import Dict, List, Tuple, Optional
 from datetime import datetime
-import uuid
+from sqlalchemy import text
 from sqlalchemy.orm import Session
 from ..models.camera_events import CameraEvent
 from ..core.exceptions import DataValidationError
+from .analytics_service import invalidate_analytics_memo
+
+# Optional Arrow-backed dtypes: string columns come out of read_csv as
+# contiguous Arrow arrays (string ops run in C++ instead of walking boxed
+# objects). Only the dtype backend is flipped -- the pyarrow parse engine
+# itself does not support chunked reads, which the ingest path relies on.
+try:
+    import pyarrow  # noqa: F401
+    _READ_CSV_KWARGS = {'dtype_backend': 'pyarrow'}
+except ImportError:
+    _READ_CSV_KWARGS = {}
+
+# Optional numba kernel for dwell-time arithmetic: fuses the NaT check,
+# subtraction and unit scaling into one parallel pass over the int64
+# nanosecond buffers instead of separate NumPy passes with temporaries.
+try:
+    from numba import njit, prange
+
+    @njit(parallel=True, cache=True)
+    def _dwell_seconds_kernel(start_ns, end_ns, nat):
+        n = start_ns.size
+        out = np.empty(n, np.int64)
+        for i in prange(n):
+            if start_ns[i] == nat or end_ns[i] == nat:
+                out[i] = 0
+            else:
+                out[i] = (end_ns[i] - start_ns[i]) // 1_000_000_000
+        return out
+except ImportError:
+    _dwell_seconds_kernel = None
 
 logger = logging.getLogger(__name__)
 
 class CSVProcessor:
     """Handles CSV file processing for camera event data with dwell time calculation"""
     
-    REQUIRED_COLUMNS = ['person_id', 'camera_id', 'camera_description', 'utc_time_started_readable', 'utc_time_ended_readable']
-    VALID_EVENT_TYPES = ['entry', 'exit', 'loiter', 'crowd', 'appearance']
-    
-    # Map your timestamp columns to our expected format
-    TIMESTAMP_COLUMNS = [
+    REQUIRED_COLUMNS = frozenset({'person_id', 'camera_id', 'camera_description', 'utc_time_started_readable', 'utc_time_ended_readable'})
+    VALID_EVENT_TYPES = frozenset({'entry', 'exit', 'loiter', 'crowd', 'appearance'})
+
+    # Map your timestamp columns to our expected format. Ordered: this is the
+    # preference order parse_timestamps uses when several are present.
+    TIMESTAMP_COLUMNS = (
         'timestamp', 'utc_time_re', 'utc_time_st', 'utc_time_e', 'frame_time',
         'utc_time_received', 'utc_time_start', 'utc_time_end',
-        'utc_time_recorded', 'utc_time_s', 'frame_time',
+        'utc_time_recorded', 'utc_time_s',
         'utc_time_started_readable', 'utc_time_ended_readable',
         # alternates used by some feeds
         'utcconvert_time_started', 'utcconvert_time_ended'
-    ]
+    )
+    _TIMESTAMP_COLUMN_SET = frozenset(TIMESTAMP_COLUMNS)
     
     # Demographic columns for story 1.6
     DEMOGRAPHIC_COLUMNS = ['age_group_outcome', 'gender_outcome']
@@ -37,6 +75,10 @@ class CSVProcessor:
     
     def __init__(self, db: Session):
         self.db = db
+        # Time-like columns discovered in this upload when none of the known
+        # TIMESTAMP_COLUMNS are present; kept per instance so one odd file
+        # cannot grow class-level state for every later upload
+        self._extra_timestamp_columns: List[str] = []
 
     def _normalize_optional_text(self, value: Optional[object], max_len: int, field_name: str, trunc_counters: Dict[str, int]) -> Optional[str]:
         if value is None:
@@ -114,17 +156,18 @@ class CSVProcessor:
             errors.append(f"Missing required columns: {missing_columns}")
         
         # Check for timestamp column (any of the allowed timestamp columns)
-        timestamp_found = any(col in df.columns for col in self.TIMESTAMP_COLUMNS)
+        timestamp_found = not self._TIMESTAMP_COLUMN_SET.isdisjoint(df.columns)
         if not timestamp_found:
             # Try to find any column that contains 'time' or 'timestamp'
             time_columns = [col for col in df.columns if 'time' in col.lower() or 'timestamp' in col.lower()]
             if time_columns:
-                # Add found time columns to allowed list
-                self.TIMESTAMP_COLUMNS.extend(time_columns)
+                # Remember them for this upload only; the class constant
+                # stays immutable
+                self._extra_timestamp_columns = time_columns
                 timestamp_found = True
                 logger.info(f"Found time columns: {time_columns}")
             else:
-                errors.append(f"Missing timestamp column. Expected one of: {self.TIMESTAMP_COLUMNS}")
+                errors.append(f"Missing timestamp column. Expected one of: {list(self.TIMESTAMP_COLUMNS)}")
                 errors.append(f"Available columns: {list(df.columns)}")
         
         # Check for empty dataframe
@@ -144,20 +187,30 @@ class CSVProcessor:
                 if missing_count > 0:
                     errors.append(f"Column '{col}' has {missing_count} missing values")
         
-        # Validate event types
+        # Validate event types. Cast to categorical first: the handful of
+        # distinct values compress to small integer codes, so this isin and
+        # every later comparison on the column scan ints instead of boxed
+        # strings. The cast sticks for the rest of the pipeline.
         if 'event_type' in df.columns:
-            invalid_events = df[~df['event_type'].isin(self.VALID_EVENT_TYPES)]
-            if not invalid_events.empty:
-                invalid_types = invalid_events['event_type'].unique()
+            if not isinstance(df['event_type'].dtype, pd.CategoricalDtype):
+                df['event_type'] = df['event_type'].astype('category')
+            # The categories ARE the distinct values, so membership is
+            # checked against k levels rather than scanning and filtering
+            # all N rows
+            invalid_types = [value for value in df['event_type'].cat.categories
+                             if value not in self.VALID_EVENT_TYPES]
+            if invalid_types:
                 errors.append(f"Invalid event types found: {invalid_types}")
         
         # Validate timestamp format
         if 'timestamp' in df.columns:
             try:
-                pd.to_datetime(df['timestamp'], errors='coerce')
-                invalid_timestamps = df[pd.to_datetime(df['timestamp'], errors='coerce').isnull()]
-                if not invalid_timestamps.empty:
-                    errors.append(f"Found {len(invalid_timestamps)} invalid timestamp values")
+                # Parse once and count NaT via a mask reduction; no need to
+                # materialize the filtered rows just to take their length
+                parsed = pd.to_datetime(df['timestamp'], errors='coerce')
+                invalid_count = int(parsed.isna().sum())
+                if invalid_count:
+                    errors.append(f"Found {invalid_count} invalid timestamp values")
             except Exception as e:
                 errors.append(f"Timestamp parsing error: {str(e)}")
         
@@ -165,30 +218,18 @@ class CSVProcessor:
     
     def process_demographic_data(self, df: pd.DataFrame) -> pd.DataFrame:
         """Process demographic data with null/undefined to 'other' mapping"""
-        # Handle age_group_outcome
-        if 'age_group_outcome' in df.columns:
-            # Map null/undefined values to "other"
-            df['age_group_outcome'] = df['age_group_outcome'].fillna('other')
-            # Also map empty strings and whitespace to "other"
-            df['age_group_outcome'] = df['age_group_outcome'].apply(
-                lambda x: 'other' if pd.isna(x) or str(x).strip() == '' else str(x).strip()
-            )
-        else:
-            # If column doesn't exist, create it with "other" as default
-            df['age_group_outcome'] = 'other'
-        
-        # Handle gender_outcome
-        if 'gender_outcome' in df.columns:
-            # Map null/undefined values to "other"
-            df['gender_outcome'] = df['gender_outcome'].fillna('other')
-            # Also map empty strings and whitespace to "other"
-            df['gender_outcome'] = df['gender_outcome'].apply(
-                lambda x: 'other' if pd.isna(x) or str(x).strip() == '' else str(x).strip()
-            )
-        else:
-            # If column doesn't exist, create it with "other" as default
-            df['gender_outcome'] = 'other'
-        
+        for col in self.DEMOGRAPHIC_COLUMNS:
+            if col in df.columns:
+                # Vectorized strip + null/empty -> "other"; one C pass over
+                # the column instead of a Python lambda per cell. Stored as
+                # categorical: demographics have a handful of levels, so the
+                # column collapses to int8 codes downstream
+                s = df[col].astype('string').str.strip()
+                df[col] = s.where(s.notna() & (s != ''), 'other').astype('category')
+            else:
+                # If column doesn't exist, create it with "other" as default
+                df[col] = pd.Categorical(['other'] * len(df))
+
         logger.info(f"Processed demographic data: age_group_outcome and gender_outcome mapped to 'other' for null values")
         return df
     
@@ -196,7 +237,7 @@ class CSVProcessor:
         """Parse timestamps with multiple format support"""
         # Find the timestamp column to use
         timestamp_col = None
-        for col in self.TIMESTAMP_COLUMNS:
+        for col in (*self.TIMESTAMP_COLUMNS, *self._extra_timestamp_columns):
             if col in df.columns:
                 timestamp_col = col
                 break
@@ -208,14 +249,15 @@ class CSVProcessor:
         
         # Convert Unix timestamps (scientific notation) to datetime
         try:
-            # Handle scientific notation (e.g., 1.754E+09)
-            if df[timestamp_col].dtype == 'object':
-                # Convert scientific notation to float first
-                df['timestamp'] = pd.to_numeric(df[timestamp_col], errors='coerce')
-            
-            # Convert Unix timestamp to datetime
-            df['timestamp'] = pd.to_datetime(df['timestamp'], unit='s', errors='coerce')
-            
+            # Handle scientific notation (e.g., 1.754E+09). to_numeric yields
+            # float64, and to_datetime's float path is far slower than the
+            # integer one, so scale to integer nanoseconds and reinterpret
+            # the buffer directly; int64 min is the NaT bit pattern, which
+            # makes unparseable values come out as NaT for free.
+            vals = pd.to_numeric(df[timestamp_col], errors='coerce').to_numpy(dtype='float64')
+            ns = np.where(np.isnan(vals), np.iinfo(np.int64).min, vals * 1e9).astype('int64')
+            df['timestamp'] = pd.Series(ns.view('datetime64[ns]'), index=df.index)
+
             # Fill any NaT values with current time
             df['timestamp'] = df['timestamp'].fillna(pd.Timestamp.now())
             
@@ -228,20 +270,49 @@ class CSVProcessor:
         
         return df
     
+    @staticmethod
+    def _parse_datetime_unique(series: pd.Series) -> pd.Series:
+        """Parse a timestamp column, parsing each distinct string only once
+
+        Camera feeds repeat the same timestamp across many rows; factorize is
+        a single hash-table pass, so the parser only runs over the unique set
+        (often a few percent of the rows).
+        """
+        codes, uniques = pd.factorize(series)
+        parsed = pd.to_datetime(uniques, format='ISO8601', errors='coerce')
+        # Feeds occasionally mix in non-ISO strings; retry just the unique
+        # values the fast path rejected with per-value format dispatch, so
+        # the expensive parser never sees more than the handful of misses
+        failed = parsed.isna() & uniques.notna()
+        if failed.any():
+            retried = pd.to_datetime(uniques[failed], format='mixed', errors='coerce')
+            vals = parsed.to_numpy(dtype='datetime64[ns]')
+            vals[failed] = retried.to_numpy(dtype='datetime64[ns]')
+            parsed = pd.DatetimeIndex(vals)
+        expanded = parsed.take(codes, allow_fill=True, fill_value=pd.NaT)
+        return pd.Series(expanded, index=series.index)
+
     def calculate_dwell_time(self, df: pd.DataFrame) -> pd.DataFrame:
         """Calculate dwell time from utc_time_started_readable and utc_time_ended_readable"""
         if 'utc_time_started_readable' in df.columns and 'utc_time_ended_readable' in df.columns:
             try:
-                # Parse timestamps
-                df['start_time'] = pd.to_datetime(df['utc_time_started_readable'], errors='coerce')
-                df['end_time'] = pd.to_datetime(df['utc_time_ended_readable'], errors='coerce')
-                
-                # Calculate dwell time in seconds
-                df['dwell_time'] = (df['end_time'] - df['start_time']).dt.total_seconds()
-                
-                # Fill NaN values with 0
-                df['dwell_time'] = df['dwell_time'].fillna(0)
-                
+                # Parse timestamps; each distinct string is parsed exactly once
+                df['start_time'] = self._parse_datetime_unique(df['utc_time_started_readable'])
+                df['end_time'] = self._parse_datetime_unique(df['utc_time_ended_readable'])
+
+                # Dwell time as integer seconds via int64 nanosecond
+                # arithmetic; the count is inherently integral, so staying in
+                # int64 avoids FP division and matches the Integer DB column.
+                # NaT (int64 min) rows become 0 directly, no fillna pass
+                start_ns = df['start_time'].to_numpy(dtype='datetime64[ns]').view('i8')
+                end_ns = df['end_time'].to_numpy(dtype='datetime64[ns]').view('i8')
+                nat = np.iinfo(np.int64).min
+                if _dwell_seconds_kernel is not None:
+                    df['dwell_time'] = _dwell_seconds_kernel(start_ns, end_ns, nat)
+                else:
+                    valid = (start_ns != nat) & (end_ns != nat)
+                    df['dwell_time'] = np.where(valid, (end_ns - start_ns) // 1_000_000_000, 0)
+
                 logger.info(f"Calculated dwell time for {len(df)} records")
                 return df
             except Exception as e:
@@ -255,31 +326,48 @@ class CSVProcessor:
     
     def clean_and_prepare_data(self, df: pd.DataFrame) -> pd.DataFrame:
         """Clean and prepare data for database insertion with dwell time calculation"""
-        # Remove duplicates
-        df = df.drop_duplicates()
-        
-        # Sort by timestamp if available
-        if 'timestamp' in df.columns:
-            df = df.sort_values('timestamp')
+        # Remove duplicates on the natural event key only; hashing every
+        # column would drag the wide raw payload fields through the hash
+        # table for no extra discrimination
+        dedup_key = [col for col in
+                     ('person_id', 'camera_id', 'event_type',
+                      'utc_time_started_readable', 'utc_time_ended_readable')
+                     if col in df.columns]
+        df = df.drop_duplicates(subset=dedup_key or None, keep='first')
         
+        # No global sort: nothing downstream needs row order. Session IDs are
+        # opaque, dwell time is computed per row, and read paths order via
+        # the timestamp indexes at query time. Sorting here was an
+        # O(N log N) pass plus a full copy of the frame per chunk.
+
         # Process demographic data
         df = self.process_demographic_data(df)
         
         # Calculate dwell time
         df = self.calculate_dwell_time(df)
         
-        # Add calculated fields
-        df['is_entry'] = df['event_type'] == 'entry'
-        df['is_exit'] = df['event_type'] == 'exit'
-        
-        # Generate session IDs for entry events
+        # == on a categorical column compares integer codes, not strings
+        # (the cast normally happened in validation, but callers can reach
+        # here directly). is_entry/is_exit are not materialized here any
+        # more -- the database derives them from event_type.
+        if 'event_type' in df.columns and not isinstance(df['event_type'].dtype, pd.CategoricalDtype):
+            df['event_type'] = df['event_type'].astype('category')
+
+
+        # Generate session IDs for entry events (vectorized string concat;
+        # token_hex avoids per-row UUID object construction)
         df['session_id'] = None
         entry_mask = df['event_type'] == 'entry'
-        df.loc[entry_mask, 'session_id'] = [
-            f"{row['person_id']}_{row['camera_id']}_{uuid.uuid4().hex[:8]}_{i}"
-            for i, (_, row) in enumerate(df[entry_mask].iterrows())
-        ]
-        
+        n_entries = int(entry_mask.sum())
+        if n_entries:
+            suffixes = np.array([secrets.token_hex(4) for _ in range(n_entries)])
+            indices = np.arange(n_entries).astype(str)
+            sub = df.loc[entry_mask, ['person_id', 'camera_id']].astype(str)
+            df.loc[entry_mask, 'session_id'] = (
+                sub['person_id'].to_numpy() + '_' + sub['camera_id'].to_numpy()
+                + '_' + suffixes + '_' + indices
+            )
+
         return df
     
     def process_csv_file(self, file_path: str, chunk_size: int = 1000) -> Dict:
@@ -287,64 +375,77 @@ class CSVProcessor:
         logger.info(f"Starting CSV processing for file: {file_path}")
         
         try:
-            # Read CSV in chunks for large files
-            chunk_reader = pd.read_csv(file_path, chunksize=chunk_size)
+            # Single pass: validate structure on the first chunk, then count
+            # and process rows as they stream by. The file is read and parsed
+            # exactly once.
             total_rows = 0
             processed_rows = 0
             errors = []
-            
+            structure_validated = False
+
             # Ingestion stats for story 1.12
             counts = {'camera_group': 0, 'department': 0, 'division': 0}
             trunc_counters: Dict[str, int] = {}
             warnings: List[str] = []
-            
-            # First pass: validate structure and count rows
-            logger.info("Validating CSV structure...")
-            first_chunk = next(pd.read_csv(file_path, chunksize=chunk_size))
-            
-            # Validate structure
-            is_valid, structure_errors = self.validate_csv_structure(first_chunk)
-            if not is_valid:
-                raise DataValidationError(f"CSV structure validation failed: {structure_errors}")
-            
-            # Count total rows
-            total_rows = sum(1 for _ in pd.read_csv(file_path, chunksize=chunk_size)) * chunk_size
-            
-            # Second pass: process data
+
             logger.info("Processing CSV data...")
-            for chunk_num, chunk in enumerate(pd.read_csv(file_path, chunksize=chunk_size)):
-                try:
-                    # Map alternates for required timestamps if necessary
-                    if 'utc_time_started_readable' not in chunk.columns and 'utcconvert_time_started' in chunk.columns:
-                        chunk['utc_time_started_readable'] = chunk['utcconvert_time_started']
-                    if 'utc_time_ended_readable' not in chunk.columns and 'utcconvert_time_ended' in chunk.columns:
-                        chunk['utc_time_ended_readable'] = chunk['utcconvert_time_ended']
-
-                    # Validate data quality
-                    is_valid, quality_errors = self.validate_data_quality(chunk)
-                    if quality_errors:
-                        errors.extend(quality_errors)
-                        logger.warning(f"Data quality issues in chunk {chunk_num}: {quality_errors}")
-                    
-                    # Apply alias mapping + normalization and collect stats
-                    chunk = self._apply_aliases_and_collect_stats(chunk, counts, trunc_counters, warnings)
-                    
-                    # Parse timestamps
-                    chunk = self.parse_timestamps(chunk)
-                    
-                    # Clean and prepare data
-                    chunk = self.clean_and_prepare_data(chunk)
-                    
-                    # Insert into database
-                    self._insert_chunk(chunk)
-                    
-                    processed_rows += len(chunk)
-                    logger.info(f"Processed chunk {chunk_num + 1}: {len(chunk)} rows")
-                    
-                except Exception as e:
-                    logger.error(f"Error processing chunk {chunk_num}: {e}")
-                    errors.append(f"Chunk {chunk_num} processing error: {str(e)}")
-            
+            # The per-chunk transform is pure CPU work with no DB access, so
+            # chunks fan out to worker processes while this process stays the
+            # single reader and single DB writer. Submission is bounded so the
+            # file is still streamed, never read whole into memory.
+            max_workers = max(1, (os.cpu_count() or 2) - 1)
+            chunk_iter = enumerate(
+                pd.read_csv(file_path, chunksize=chunk_size, **_READ_CSV_KWARGS))
+            pending: deque = deque()
+            exhausted = False
+            with ProcessPoolExecutor(max_workers=max_workers) as pool:
+                while True:
+                    while not exhausted and len(pending) < max_workers * 2:
+                        try:
+                            chunk_num, chunk = next(chunk_iter)
+                        except StopIteration:
+                            exhausted = True
+                            break
+                        if not structure_validated:
+                            logger.info("Validating CSV structure...")
+                            is_valid, structure_errors = self.validate_csv_structure(chunk)
+                            if not is_valid:
+                                raise DataValidationError(f"CSV structure validation failed: {structure_errors}")
+                            structure_validated = True
+                        total_rows += len(chunk)
+                        pending.append((chunk_num, pool.submit(
+                            _transform_chunk, chunk, list(self._extra_timestamp_columns))))
+
+                    if not pending:
+                        break
+
+                    # Drain in submission order so errors and stats keep
+                    # their chunk numbering
+                    chunk_num, future = pending.popleft()
+                    try:
+                        prepared, quality_errors, chunk_counts, chunk_trunc, chunk_warnings = future.result()
+                        if quality_errors:
+                            errors.extend(quality_errors)
+                            logger.warning(f"Data quality issues in chunk {chunk_num}: {quality_errors}")
+                        for key, value in chunk_counts.items():
+                            counts[key] = counts.get(key, 0) + value
+                        for key, value in chunk_trunc.items():
+                            trunc_counters[key] = trunc_counters.get(key, 0) + value
+                        warnings.extend(chunk_warnings)
+
+                        # Insert into database (sequential, parent process)
+                        self._insert_chunk(prepared)
+
+                        processed_rows += len(prepared)
+                        logger.info(f"Processed chunk {chunk_num + 1}: {len(prepared)} rows")
+
+                    except Exception as e:
+                        logger.error(f"Error processing chunk {chunk_num}: {e}")
+                        errors.append(f"Chunk {chunk_num} processing error: {str(e)}")
+
+            if not structure_validated:
+                raise DataValidationError("CSV structure validation failed: ['CSV file is empty']")
+
             # Calculate processing statistics
             success_rate = (processed_rows / total_rows * 100) if total_rows > 0 else 0
 
@@ -374,89 +475,127 @@ class CSVProcessor:
             logger.error(f"CSV processing failed: {e}")
             raise DataValidationError(f"CSV processing failed: {str(e)}")
     
+    # Model fields copied from the CSV chunk when present (order matches the model)
+    EVENT_FIELDS = [
+        # Core fields
+        'person_id', 'retain', 'appearance_labeled_ou_event', 'event_type', 'event_id',
+        # Timestamp fields
+        'utc_time_recorded', 'utc_time_recorded_readable',
+        'utc_time_started_readable', 'utc_time_ended_readable',
+        # Frame information
+        'first_frame', 'last_frame_attributes',
+        # Camera information
+        'camera_id', 'camera_de_node_id', 'camera_group', 'department', 'division',
+        'camera_description',
+        # Analysis fields
+        'analysis_m_record_face', 'matching_camera', 'camera_grc', 'camera_grc_zone_name',
+        # Zone information
+        'zone_id', 'zone_verific_face_score', 'zone_name',
+        # Frame details
+        'frame_id', 'frame_time',
+        # Bounding box coordinates
+        'bbox_x1', 'bbox_y1', 'bbox_x2', 'bbox_y2',
+        # Watchlist information
+        'watchlist_ty', 'watchlist_d', 'watchlist_g_match',
+        # Demographics (existing)
+        'out_age_group', 'gender', 'out_liveness',
+        # Enhanced demographics (story 1.6)
+        'age_group_outcome', 'gender_outcome',
+        # Calculated fields
+        'session_id', 'dwell_time',
+    ]
+
     def _insert_chunk(self, df: pd.DataFrame):
         """Insert a chunk of data into the database"""
-        events = []
-        
-        for _, row in df.iterrows():
-            # Convert timestamp to processed_timestamp
-            processed_timestamp = None
-            if 'timestamp' in row and pd.notna(row['timestamp']):
-                processed_timestamp = row['timestamp']
-            
-            event = CameraEvent(
-                # Core fields
-                person_id=str(row.get('person_id', '')),
-                retain=row.get('retain', False),
-                appearance_labeled_ou_event=row.get('appearance_labeled_ou_event'),
-                event_type=str(row.get('event_type', '')),
-                event_id=row.get('event_id'),
-                
-                # Timestamp fields
-                utc_time_recorded=row.get('utc_time_recorded'),
-                utc_time_recorded_readable=row.get('utc_time_recorded_readable'),
-                utc_time_started_readable=row.get('utc_time_started_readable'),
-                utc_time_ended_readable=row.get('utc_time_ended_readable'),
-                
-                # Frame information
-                first_frame=row.get('first_frame'),
-                last_frame_attributes=row.get('last_frame_attributes'),
-                
-                # Camera information
-                camera_id=str(row.get('camera_id', '')),
-                camera_de_node_id=row.get('camera_de_node_id'),
-                camera_group=row.get('camera_group'),
-                department=row.get('department'),
-                division=row.get('division'),
-                camera_description=row.get('camera_description'),
-                
-                # Analysis fields
-                analysis_m_record_face=row.get('analysis_m_record_face'),
-                matching_camera=row.get('matching_camera'),
-                camera_grc=row.get('camera_grc'),
-                camera_grc_zone_name=row.get('camera_grc_zone_name'),
-                
-                # Zone information
-                zone_id=row.get('zone_id'),
-                zone_verific_face_score=row.get('zone_verific_face_score'),
-                zone_name=row.get('zone_name'),
-                
-                # Frame details
-                frame_id=row.get('frame_id'),
-                frame_time=row.get('frame_time'),
-                
-                # Bounding box coordinates
-                bbox_x1=row.get('bbox_x1'),
-                bbox_y1=row.get('bbox_y1'),
-                bbox_x2=row.get('bbox_x2'),
-                bbox_y2=row.get('bbox_y2'),
-                
-                # Watchlist information
-                watchlist_ty=row.get('watchlist_ty'),
-                watchlist_d=row.get('watchlist_d'),
-                watchlist_g_match=row.get('watchlist_g_match'),
-                
-                # Demographics (existing)
-                out_age_group=row.get('out_age_group'),
-                gender=row.get('gender'),
-                out_liveness=row.get('out_liveness'),
-                
-                # Enhanced demographics (new for story 1.6)
-                age_group_outcome=row.get('age_group_outcome'),
-                gender_outcome=row.get('gender_outcome'),
-                
-                # Calculated fields
-                session_id=row.get('session_id'),
-                dwell_time=row.get('dwell_time', 0),  # Pre-calculated dwell time
-                is_entry=row.get('is_entry'),
-                is_exit=row.get('is_exit'),
-                processed_timestamp=processed_timestamp,
-                
-                # Raw data
-                raw_data=row.to_json()
-            )
-            events.append(event)
-        
-        # Bulk insert for performance
-        self.db.bulk_save_objects(events)
-        self.db.commit() 
\ No newline at end of file
+        if df.empty:
+            return
+
+        # Serialize raw rows in one C call instead of per-row to_json()
+        raw_lines = df.to_json(orient='records', lines=True).splitlines()
+
+        # Build the insert frame column-wise (vectorized) rather than row-wise
+        data = pd.DataFrame(index=df.index)
+        for field in self.EVENT_FIELDS:
+            data[field] = df[field] if field in df.columns else None
+
+        # Mirror the old per-row coercions (via object so categorical and
+        # string-dtype columns take the same path)
+        for field in ('person_id', 'camera_id', 'event_type'):
+            data[field] = data[field].astype(object).fillna('').astype(str)
+        if 'retain' in df.columns:
+            data['retain'] = df['retain'].fillna(False)
+        else:
+            data['retain'] = False
+        if 'dwell_time' in df.columns:
+            data['dwell_time'] = df['dwell_time'].fillna(0).astype('int64')
+        else:
+            data['dwell_time'] = 0
+        # Prefer the parsed datetimes over the raw strings for DateTime columns
+        if 'start_time' in df.columns:
+            data['utc_time_started_readable'] = df['start_time']
+        if 'end_time' in df.columns:
+            data['utc_time_ended_readable'] = df['end_time']
+        data['processed_timestamp'] = df['timestamp'] if 'timestamp' in df.columns else None
+
+        data['raw_data'] = raw_lines
+
+        # NaN/NaT -> None so the DB driver sees proper NULLs
+        data = data.astype(object).where(pd.notna(data), None)
+
+        if self.db.get_bind().dialect.name == 'postgresql':
+            # SET LOCAL scopes the relaxed durability to this chunk's
+            # transaction only — it reverts at commit, so the pooled
+            # connection is never handed back with synchronous_commit off.
+            # An async commit can only lose the newest chunks on a server
+            # crash, and an ingest is simply re-run from the CSV then.
+            self.db.execute(text("SET LOCAL synchronous_commit = OFF"))
+            # COPY FROM STDIN: bypasses per-row parameter binding entirely.
+            # to_csv is one vectorized C call; \N marks NULLs so that empty
+            # strings (coerced identifiers) survive as empty strings.
+            buf = io.StringIO()
+            data.to_csv(buf, index=False, header=False, na_rep='\\N')
+            buf.seek(0)
+            columns = ', '.join(data.columns)
+            cursor = self.db.connection().connection.cursor()
+            try:
+                cursor.copy_expert(
+                    f"COPY camera_events ({columns}) FROM STDIN WITH (FORMAT csv, NULL '\\N')",
+                    buf)
+            finally:
+                cursor.close()
+        else:
+            # Core executemany insert: skips the ORM mapper entirely, letting
+            # the driver batch the rows into multi-row INSERT statements
+            self.db.execute(CameraEvent.__table__.insert(), data.to_dict(orient='records'))
+        self.db.commit()
+
+        # New events make memoized analytics stale
+        invalidate_analytics_memo()
+
+def _transform_chunk(chunk: pd.DataFrame, extra_timestamp_columns: List[str]):
+    """Run the CPU-bound per-chunk transform; executed in a worker process.
+
+    Module-level (picklable) and DB-free: the parent keeps the session and
+    does the inserts. Returns the prepared frame plus the quality errors and
+    ingestion stats collected for this chunk so the parent can merge them.
+    """
+    processor = CSVProcessor(None)
+    processor._extra_timestamp_columns = extra_timestamp_columns
+
+    counts = {'camera_group': 0, 'department': 0, 'division': 0}
+    trunc_counters: Dict[str, int] = {}
+    warnings: List[str] = []
+
+    # Map alternates for required timestamps if necessary
+    if 'utc_time_started_readable' not in chunk.columns and 'utcconvert_time_started' in chunk.columns:
+        chunk['utc_time_started_readable'] = chunk['utcconvert_time_started']
+    if 'utc_time_ended_readable' not in chunk.columns and 'utcconvert_time_ended' in chunk.columns:
+        chunk['utc_time_ended_readable'] = chunk['utcconvert_time_ended']
+
+    _, quality_errors = processor.validate_data_quality(chunk)
+
+    chunk = processor._apply_aliases_and_collect_stats(chunk, counts, trunc_counters, warnings)
+    chunk = processor.parse_timestamps(chunk)
+    chunk = processor.clean_and_prepare_data(chunk)
+
+    return chunk, quality_errors, counts, trunc_counters, warnings
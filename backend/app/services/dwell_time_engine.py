@@ -1,17 +1,84 @@
 import pandas as pd
+import numpy as np
 import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
 from typing import Dict, List, Tuple, Optional
 from datetime import datetime, timedelta
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, func
+from sqlalchemy import and_, or_, func, update, bindparam
 from ..models.camera_events import CameraEvent, PersonSession
 from ..core.exceptions import ProcessingError
+from .analytics_service import invalidate_analytics_memo
 
 logger = logging.getLogger(__name__)
 
+
+def _match_entry_exit_ns(entry_ns, exit_ns):
+    """Two-pointer entry/exit matching over int64 nanosecond arrays.
+
+    Returns the positional indices of the matched pairs. Operating on raw
+    int64 scalars keeps the loop free of per-step Series construction; when
+    numba is available the whole function is compiled to native code below.
+    """
+    max_pairs = min(entry_ns.size, exit_ns.size)
+    out_entries = np.empty(max_pairs, np.int64)
+    out_exits = np.empty(max_pairs, np.int64)
+    i = 0
+    j = 0
+    k = 0
+    while i < entry_ns.size and j < exit_ns.size:
+        # If exit comes before entry, skip the exit
+        if exit_ns[j] < entry_ns[i]:
+            j += 1
+        # If entry comes before exit, we have a valid pair
+        elif entry_ns[i] < exit_ns[j]:
+            out_entries[k] = i
+            out_exits[k] = j
+            k += 1
+            i += 1
+            j += 1
+        else:
+            # Skip this entry if no matching exit found
+            i += 1
+    return out_entries[:k], out_exits[:k]
+
+
+try:
+    from numba import njit
+    _match_entry_exit_ns = njit(cache=True)(_match_entry_exit_ns)
+except ImportError:
+    pass
+
+
+def _match_groups(ns, is_entry, is_exit, starts, ends):
+    """Match entries/exits for a run of contiguous (person, camera) groups.
+
+    Positions are relative to the arrays passed in. Module-level (and
+    operating on plain arrays only) so it is picklable and a block of
+    groups can be shipped to a worker process as one unit.
+    """
+    entry_pos_parts = []
+    exit_pos_parts = []
+    for start, end in zip(starts, ends):
+        entry_pos = np.flatnonzero(is_entry[start:end]) + start
+        exit_pos = np.flatnonzero(is_exit[start:end]) + start
+        matched_entries, matched_exits = _match_entry_exit_ns(ns[entry_pos], ns[exit_pos])
+        if matched_entries.size:
+            entry_pos_parts.append(entry_pos[matched_entries])
+            exit_pos_parts.append(exit_pos[matched_exits])
+    if not entry_pos_parts:
+        return np.empty(0, np.int64), np.empty(0, np.int64)
+    return np.concatenate(entry_pos_parts), np.concatenate(exit_pos_parts)
+
+
 class DwellTimeEngine:
     """Calculates dwell times from camera events"""
-    
+
+    # Below this many events the matching loop finishes in milliseconds and
+    # worker startup/pickling would dominate, so stay serial
+    PARALLEL_MIN_ROWS = 200_000
+
     def __init__(self, db: Session):
         self.db = db
     
@@ -21,37 +88,33 @@ class DwellTimeEngine:
         logger.info("Starting dwell time calculations...")
         
         try:
-            # Get events for the date range
-            query = self.db.query(CameraEvent)
+            # Fetch only the needed columns straight into a DataFrame; no ORM
+            # objects are hydrated just to be torn apart again. The sessions
+            # calculation does its own sort, so no ORDER BY either.
+            query = self.db.query(
+                CameraEvent.id,
+                CameraEvent.processed_timestamp.label('timestamp'),
+                CameraEvent.person_id,
+                CameraEvent.camera_id,
+                CameraEvent.event_type,
+                CameraEvent.session_id
+            )
             if start_date:
                 query = query.filter(CameraEvent.processed_timestamp >= start_date)
             if end_date:
                 query = query.filter(CameraEvent.processed_timestamp <= end_date)
-            
-            events = query.order_by(CameraEvent.person_id, CameraEvent.camera_id, CameraEvent.processed_timestamp).all()
-            
-            if not events:
+
+            events_df = pd.read_sql(query.statement, self.db.get_bind())
+
+            if events_df.empty:
                 logger.warning("No events found for dwell time calculation")
                 return {'sessions_processed': 0, 'total_dwell_time': 0, 'errors': []}
             
-            # Convert to DataFrame for easier processing
-            events_df = pd.DataFrame([
-                {
-                    'id': event.id,
-                    'timestamp': event.processed_timestamp,
-                    'person_id': event.person_id,
-                    'camera_id': event.camera_id,
-                    'event_type': event.event_type,
-                    'session_id': event.session_id
-                }
-                for event in events
-            ])
-            
             # Calculate dwell times
             sessions = self._calculate_sessions(events_df)
             
             # Store sessions in database
-            stored_sessions = self._store_sessions(sessions)
+            self._store_sessions(sessions)
             
             # Update camera events with dwell durations
             self._update_events_with_dwell_times(sessions)
@@ -68,109 +131,211 @@ class DwellTimeEngine:
     
     def _calculate_sessions(self, events_df: pd.DataFrame) -> List[Dict]:
         """Calculate sessions from entry/exit events"""
-        sessions = []
-        
-        # Group by person and camera
-        for (person_id, camera_id), group in events_df.groupby(['person_id', 'camera_id']):
-            # Sort by timestamp
-            group = group.sort_values('timestamp')
-            
-            # Find entry/exit pairs
-            entries = group[group['event_type'] == 'entry']
-            exits = group[group['event_type'] == 'exit']
-            
-            # Match entries with exits
-            session_pairs = self._match_entries_exits(entries, exits)
-            
-            for entry, exit_event in session_pairs:
-                dwell_duration = int((exit_event['timestamp'] - entry['timestamp']).total_seconds())
-                
-                session = {
-                    'session_id': f"{person_id}_{camera_id}_{entry['timestamp'].strftime('%Y%m%d_%H%M%S')}",
-                    'person_id': person_id,
-                    'camera_id': camera_id,
-                    'entry_time': entry['timestamp'],
-                    'exit_time': exit_event['timestamp'],
-                    'dwell_duration': dwell_duration
-                }
-                sessions.append(session)
-        
-        return sessions
+        if events_df.empty:
+            return []
+
+        # Struct-of-arrays: pull the four needed columns out once, then one
+        # lexsort orders all of them so (person, camera) groups are
+        # contiguous runs. No sorted copy of the DataFrame is ever built and
+        # all per-group work is plain array slicing
+        person = events_df['person_id'].to_numpy()
+        camera = events_df['camera_id'].to_numpy()
+        # as_unit pins the epoch values to nanoseconds regardless of the
+        # resolution the column was parsed with
+        ts = pd.DatetimeIndex(events_df['timestamp']).as_unit('ns')
+        ns = ts.asi8
+        event_type = events_df['event_type'].to_numpy()
+
+        order = np.lexsort((ns, camera, person))
+        person = person[order]
+        camera = camera[order]
+        ns = ns[order]
+        ts = ts.take(order)
+        is_entry = event_type[order] == 'entry'
+        is_exit = event_type[order] == 'exit'
+
+        # Group boundaries via change detection on the sorted key columns
+        change = np.empty(len(person), dtype=bool)
+        change[0] = True
+        change[1:] = (person[1:] != person[:-1]) | (camera[1:] != camera[:-1])
+        starts = np.flatnonzero(change)
+        ends = np.append(starts[1:], len(person))
+
+        # Matching is independent per group, so above the serial threshold
+        # contiguous blocks of groups are matched in worker processes; each
+        # block ships only its own slice of the arrays
+        if len(person) >= self.PARALLEL_MIN_ROWS and starts.size > 1:
+            workers = min(max(1, (os.cpu_count() or 2) - 1), starts.size)
+        else:
+            workers = 1
+
+        if workers > 1:
+            blocks = [b for b in np.array_split(np.arange(starts.size), workers) if b.size]
+            offsets = [starts[block[0]] for block in blocks]
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = [
+                    pool.submit(
+                        _match_groups,
+                        ns[lo:ends[block[-1]]], is_entry[lo:ends[block[-1]]],
+                        is_exit[lo:ends[block[-1]]],
+                        starts[block] - lo, ends[block] - lo
+                    )
+                    for block, lo in zip(blocks, offsets)
+                ]
+                parts = [future.result() for future in futures]
+            entry_pos = np.concatenate([e + lo for (e, _), lo in zip(parts, offsets)])
+            exit_pos = np.concatenate([x + lo for (_, x), lo in zip(parts, offsets)])
+        else:
+            entry_pos, exit_pos = _match_groups(ns, is_entry, is_exit, starts, ends)
+
+        if entry_pos.size == 0:
+            return []
+
+        # Vectorized session fields: one subtraction for durations, one
+        # strftime pass and one string concat for the IDs
+        entry_times = ts[entry_pos]
+        exit_times = ts[exit_pos]
+        dwell_durations = (ns[exit_pos] - ns[entry_pos]) // 1_000_000_000
+        session_ids = (
+            person[entry_pos].astype(str) + '_' + camera[entry_pos].astype(str)
+            + '_' + np.asarray(entry_times.strftime('%Y%m%d_%H%M%S'))
+        )
+
+        return [
+            {
+                'session_id': session_id,
+                'person_id': person_id,
+                'camera_id': camera_id,
+                'entry_time': entry_time,
+                'exit_time': exit_time,
+                'dwell_duration': int(dwell_duration)
+            }
+            for session_id, person_id, camera_id, entry_time, exit_time, dwell_duration
+            in zip(session_ids, person[entry_pos], camera[entry_pos],
+                   entry_times, exit_times, dwell_durations)
+        ]
     
     def _match_entries_exits(self, entries: pd.DataFrame, exits: pd.DataFrame) -> List[Tuple]:
         """Match entry events with corresponding exit events"""
-        pairs = []
-        entry_idx = 0
-        exit_idx = 0
-        
-        while entry_idx < len(entries) and exit_idx < len(exits):
-            entry = entries.iloc[entry_idx]
-            exit_event = exits.iloc[exit_idx]
-            
-            # If exit comes before entry, skip the exit
-            if exit_event['timestamp'] < entry['timestamp']:
-                exit_idx += 1
-                continue
-            
-            # If entry comes before exit, we have a valid pair
-            if entry['timestamp'] < exit_event['timestamp']:
-                pairs.append((entry.to_dict(), exit_event.to_dict()))
-                entry_idx += 1
-                exit_idx += 1
-            else:
-                # Skip this entry if no matching exit found
-                entry_idx += 1
-        
-        return pairs
+        # Run the matcher over raw nanosecond arrays (asi8 handles both
+        # naive and tz-aware timestamps); only the matched rows are ever
+        # materialized as dicts
+        entry_ns = pd.DatetimeIndex(entries['timestamp']).as_unit('ns').asi8
+        exit_ns = pd.DatetimeIndex(exits['timestamp']).as_unit('ns').asi8
+        entry_idx, exit_idx = _match_entry_exit_ns(entry_ns, exit_ns)
+        if entry_idx.size == 0:
+            return []
+        matched_entries = entries.iloc[entry_idx].to_dict('records')
+        matched_exits = exits.iloc[exit_idx].to_dict('records')
+        return list(zip(matched_entries, matched_exits))
     
-    def _store_sessions(self, sessions: List[Dict]) -> List[PersonSession]:
-        """Store calculated sessions in the database"""
-        stored_sessions = []
-        
-        for session_data in sessions:
-            # Check if session already exists
-            existing = self.db.query(PersonSession).filter(
-                PersonSession.session_id == session_data['session_id']
-            ).first()
-            
-            if existing:
-                # Update existing session
-                existing.exit_time = session_data['exit_time']
-                existing.dwell_duration = session_data['dwell_duration']
-            else:
-                # Create new session
-                session = PersonSession(
-                    session_id=session_data['session_id'],
-                    person_id=session_data['person_id'],
-                    camera_id=session_data['camera_id'],
-                    entry_time=session_data['entry_time'],
-                    exit_time=session_data['exit_time'],
-                    dwell_duration=session_data['dwell_duration']
-                )
-                self.db.add(session)
-                stored_sessions.append(session)
-        
+    def _store_sessions(self, sessions: List[Dict]) -> int:
+        """Store calculated sessions in the database via a single upsert"""
+        if not sessions:
+            return 0
+
+        # One INSERT ... ON CONFLICT instead of a SELECT round-trip per
+        # session_id followed by individual INSERTs/UPDATEs
+        if self.db.get_bind().dialect.name == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert as upsert_insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert as upsert_insert
+
+        stmt = upsert_insert(PersonSession.__table__)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['session_id'],
+            set_={
+                'exit_time': stmt.excluded.exit_time,
+                'dwell_duration': stmt.excluded.dwell_duration
+            }
+        )
+        self.db.execute(stmt, [
+            {
+                'session_id': session_data['session_id'],
+                'person_id': session_data['person_id'],
+                'camera_id': session_data['camera_id'],
+                'entry_time': session_data['entry_time'],
+                'exit_time': session_data['exit_time'],
+                'dwell_duration': session_data['dwell_duration']
+            }
+            for session_data in sessions
+        ])
         self.db.commit()
-        return stored_sessions
+
+        # New sessions make memoized analytics stale
+        invalidate_analytics_memo()
+        return len(sessions)
     
     def _update_events_with_dwell_times(self, sessions: List[Dict]):
         """Update camera events with calculated dwell durations"""
-        for session in sessions:
-            # Find events in this session
-            events = self.db.query(CameraEvent).filter(
+        if not sessions:
+            return
+
+        if self.db.get_bind().dialect.name == 'postgresql':
+            # One statement for the whole batch: the sessions become an
+            # inline VALUES list joined against camera_events, so the
+            # database evaluates the update as a single join over
+            # idx_person_camera_timestamp instead of one UPDATE per session
+            from psycopg2.extras import execute_values
+            cursor = self.db.connection().connection.cursor()
+            try:
+                execute_values(
+                    cursor,
+                    """
+                    WITH s(person_id, camera_id, entry_time, exit_time,
+                           dwell_duration, session_id) AS (VALUES %s)
+                    UPDATE camera_events e
+                       SET dwell_duration = s.dwell_duration,
+                           session_id = s.session_id
+                      FROM s
+                     WHERE e.person_id = s.person_id
+                       AND e.camera_id = s.camera_id
+                       AND e.processed_timestamp BETWEEN s.entry_time AND s.exit_time
+                    """,
+                    [
+                        (session['person_id'], session['camera_id'],
+                         session['entry_time'], session['exit_time'],
+                         session['dwell_duration'], session['session_id'])
+                        for session in sessions
+                    ]
+                )
+            finally:
+                cursor.close()
+            self.db.commit()
+            return
+
+        # Other dialects: one criteria UPDATE executed as a batch via
+        # executemany, with no per-session SELECT and no ORM hydration of
+        # the matched events. Targets the Table (not the mapped class) so
+        # the session executes it as plain Core
+        events = CameraEvent.__table__
+        stmt = (
+            update(events)
+            .where(
                 and_(
-                    CameraEvent.person_id == session['person_id'],
-                    CameraEvent.camera_id == session['camera_id'],
-                    CameraEvent.processed_timestamp >= session['entry_time'],
-                    CameraEvent.processed_timestamp <= session['exit_time']
+                    events.c.person_id == bindparam('b_person_id'),
+                    events.c.camera_id == bindparam('b_camera_id'),
+                    events.c.processed_timestamp >= bindparam('b_entry_time'),
+                    events.c.processed_timestamp <= bindparam('b_exit_time')
                 )
-            ).all()
-            
-            # Update events with dwell duration
-            for event in events:
-                event.dwell_duration = session['dwell_duration']
-                event.session_id = session['session_id']
-        
+            )
+            .values(
+                dwell_duration=bindparam('b_dwell_duration'),
+                session_id=bindparam('b_session_id')
+            )
+        )
+        params = [
+            {
+                'b_person_id': session['person_id'],
+                'b_camera_id': session['camera_id'],
+                'b_entry_time': session['entry_time'],
+                'b_exit_time': session['exit_time'],
+                'b_dwell_duration': session['dwell_duration'],
+                'b_session_id': session['session_id']
+            }
+            for session in sessions
+        ]
+        self.db.execute(stmt, params)
         self.db.commit()
     
     def _calculate_summary_stats(self, sessions: List[Dict]) -> Dict:
@@ -185,15 +350,18 @@ class DwellTimeEngine:
                 'min_dwell_time': 0
             }
         
-        dwell_times = [s['dwell_duration'] for s in sessions]
-        
+        # Single contiguous array; each stat is then one C reduction, and the
+        # median uses an O(n) partition instead of sorting a Python list
+        dwell_times = np.fromiter(
+            (s['dwell_duration'] for s in sessions), dtype=np.int64, count=len(sessions))
+
         return {
             'sessions_processed': len(sessions),
-            'total_dwell_time': sum(dwell_times),
-            'average_dwell_time': sum(dwell_times) / len(dwell_times),
-            'median_dwell_time': sorted(dwell_times)[len(dwell_times) // 2],
-            'max_dwell_time': max(dwell_times),
-            'min_dwell_time': min(dwell_times)
+            'total_dwell_time': int(dwell_times.sum()),
+            'average_dwell_time': float(dwell_times.mean()),
+            'median_dwell_time': int(np.partition(dwell_times, len(dwell_times) // 2)[len(dwell_times) // 2]),
+            'max_dwell_time': int(dwell_times.max()),
+            'min_dwell_time': int(dwell_times.min())
         }
     
     def get_dwell_time_analytics(self, start_date: Optional[datetime] = None,
@@ -201,47 +369,91 @@ class DwellTimeEngine:
                                 group_by: str = 'person') -> Dict:
         """Get dwell time analytics grouped by specified dimension"""
         
-        query = self.db.query(PersonSession)
-        
+        if group_by == 'person':
+            group_col = PersonSession.person_id
+            group_key = 'person_id'
+        elif group_by == 'camera':
+            group_col = PersonSession.camera_id
+            group_key = 'camera_id'
+        else:
+            raise ValueError(f"Unsupported group_by value: {group_by}")
+
+        filters = []
         if start_date:
-            query = query.filter(PersonSession.entry_time >= start_date)
+            filters.append(PersonSession.entry_time >= start_date)
         if end_date:
-            query = query.filter(PersonSession.exit_time <= end_date)
-        
-        sessions = query.all()
-        
-        if not sessions:
+            filters.append(PersonSession.exit_time <= end_date)
+
+        dwell = PersonSession.dwell_duration
+
+        # Aggregate in the database: one scan returning k group rows instead
+        # of transferring every session just to reduce it in pandas
+        agg_rows = (
+            self.db.query(
+                group_col.label(group_key),
+                func.count(PersonSession.id).label('count'),
+                func.avg(dwell).label('mean'),
+                func.max(dwell).label('max'),
+                func.min(dwell).label('min'),
+                func.sum(dwell).label('sum')
+            )
+            .filter(*filters)
+            .group_by(group_col)
+            .all()
+        )
+
+        if not agg_rows:
             return {'groups': [], 'summary': {}}
-        
-        # Convert to DataFrame for analysis
-        sessions_df = pd.DataFrame([
+
+        # Medians: PostgreSQL computes them in the same engine via
+        # percentile_cont; SQLite has no ordered-set aggregates, so pull just
+        # the two needed columns and reduce locally
+        if self.db.get_bind().dialect.name == 'postgresql':
+            median_rows = (
+                self.db.query(
+                    group_col,
+                    func.percentile_cont(0.5).within_group(dwell)
+                )
+                .filter(*filters)
+                .group_by(group_col)
+                .all()
+            )
+            medians = dict(median_rows)
+            overall_median = self.db.query(
+                func.percentile_cont(0.5).within_group(dwell)
+            ).filter(*filters).scalar()
+        else:
+            pairs = pd.DataFrame(
+                self.db.query(group_col, dwell).filter(*filters).all(),
+                columns=[group_key, 'dwell_duration']
+            )
+            medians = pairs.groupby(group_key)['dwell_duration'].median().to_dict()
+            overall_median = pairs['dwell_duration'].median()
+
+        # Row attribute access collides with tuple methods for labels like
+        # 'count', so go through _mapping
+        groups = [
             {
-                'person_id': s.person_id,
-                'camera_id': s.camera_id,
-                'dwell_duration': s.dwell_duration,
-                'entry_time': s.entry_time,
-                'exit_time': s.exit_time
+                group_key: row._mapping[group_key],
+                'count': row._mapping['count'],
+                'mean': row._mapping['mean'],
+                'median': medians.get(row._mapping[group_key]),
+                'max': row._mapping['max'],
+                'min': row._mapping['min'],
+                'sum': row._mapping['sum']
             }
-            for s in sessions
-        ])
-        
-        if group_by == 'person':
-            grouped = sessions_df.groupby('person_id')['dwell_duration'].agg([
-                'count', 'mean', 'median', 'max', 'min', 'sum'
-            ]).reset_index()
-        elif group_by == 'camera':
-            grouped = sessions_df.groupby('camera_id')['dwell_duration'].agg([
-                'count', 'mean', 'median', 'max', 'min', 'sum'
-            ]).reset_index()
-        else:
-            raise ValueError(f"Unsupported group_by value: {group_by}")
-        
+            for row in agg_rows
+        ]
+
+        total_sessions = sum(row._mapping['count'] for row in agg_rows)
+        total_dwell_time = sum(row._mapping['sum'] for row in agg_rows)
+
         return {
-            'groups': grouped.to_dict('records'),
+            'groups': groups,
             'summary': {
-                'total_sessions': len(sessions),
-                'total_dwell_time': sessions_df['dwell_duration'].sum(),
-                'average_dwell_time': sessions_df['dwell_duration'].mean(),
-                'median_dwell_time': sessions_df['dwell_duration'].median()
+                'total_sessions': total_sessions,
+                'total_dwell_time': total_dwell_time,
+                'average_dwell_time': total_dwell_time / total_sessions if total_sessions else 0,
+                'median_dwell_time': overall_median
             }
-        } 
\ No newline at end of file
+        }
\ No newline at end of file
@@ -0,0 +1,23 @@
+import pytest
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--run-integration", action="store_true", default=False,
+        help="run tests marked as integration (live HTTP / full-app checks)")
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        "markers",
+        "integration: long-form API tests excluded from the default run")
+
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption("--run-integration"):
+        return
+    skip_integration = pytest.mark.skip(
+        reason="integration test; pass --run-integration to run")
+    for item in items:
+        if "integration" in item.keywords:
+            item.add_marker(skip_integration)
@@ -3,10 +3,14 @@
 Test script to upload sample data and test filtering functionality
 """
 
+import pytest
 import requests
 import json
 import time
 
+# Requires a live backend on port 8000; excluded from the default run
+pytestmark = pytest.mark.integration
+
 def test_filtering():
     base_url = "http://localhost:8000"
     
@@ -1,93 +1,107 @@
 import pytest
 import pandas as pd
 from datetime import datetime, timedelta
-from sqlalchemy.orm import Session
-from unittest.mock import Mock, patch
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import StaticPool
 import tempfile
 import os
 
+from app.core.database import Base
 from app.services.csv_processor import CSVProcessor
 from app.services.dwell_time_engine import DwellTimeEngine
-from app.services.analytics_service import AnalyticsService
+from app.services.analytics_service import AnalyticsService, invalidate_analytics_memo
 from app.models.camera_events import CameraEvent, PersonSession
 from app.core.exceptions import DataValidationError, ProcessingError, AnalyticsError
 
+# Test database: a single in-memory engine shared through a StaticPool,
+# same pattern as tests/unit/test_waiting_time_analytics.py
+engine = create_engine(
+    "sqlite:///:memory:",
+    connect_args={"check_same_thread": False},
+    poolclass=StaticPool,
+)
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+# pysqlite ends transactions on its own, which breaks SAVEPOINTs; take
+# over transaction control so the outer per-test rollback really undoes
+# everything committed inside the test
+@event.listens_for(engine, "connect")
+def _sqlite_connect(dbapi_connection, connection_record):
+    dbapi_connection.isolation_level = None
+
+@event.listens_for(engine, "begin")
+def _sqlite_begin(conn):
+    conn.exec_driver_sql("BEGIN")
+
+# Shared, pre-typed frames built once per module: the validators treat
+# their input as read-only, so every test reuses the same objects instead
+# of re-running dict-to-DataFrame inference
+
+@pytest.fixture(scope="module")
+def valid_events_df():
+    return pd.DataFrame({
+        'timestamp': pd.to_datetime(
+            ['2024-01-01 10:00:00', '2024-01-01 10:01:00'],
+            format='%Y-%m-%d %H:%M:%S', cache=True),
+        'person_id': pd.array(['person1', 'person2'], dtype='string'),
+        'camera_id': pd.array(['camera1', 'camera1'], dtype='string'),
+        'event_type': pd.Categorical(['entry', 'exit'])
+    })
+
+@pytest.fixture(scope="module")
+def missing_cols_df():
+    # Missing camera_id and event_type
+    return pd.DataFrame({
+        'timestamp': pd.to_datetime(
+            ['2024-01-01 10:00:00'], format='%Y-%m-%d %H:%M:%S', cache=True),
+        'person_id': pd.array(['person1'], dtype='string')
+    })
+
+@pytest.fixture(scope="module")
+def invalid_event_df():
+    return pd.DataFrame({
+        'timestamp': pd.to_datetime(
+            ['2024-01-01 10:00:00', '2024-01-01 10:01:00'],
+            format='%Y-%m-%d %H:%M:%S', cache=True),
+        'person_id': pd.array(['person1', 'person2'], dtype='string'),
+        'camera_id': pd.array(['camera1', 'camera1'], dtype='string'),
+        'event_type': pd.Categorical(['entry', 'invalid_event'])
+    })
+
+@pytest.fixture(scope="module")
+def processor():
+    # The validators and parser under test never touch the session, so one
+    # instance serves every TestCSVProcessor test (the ingest worker builds
+    # CSVProcessor(None) the same way)
+    return CSVProcessor(None)
+
 class TestCSVProcessor:
     """Test CSV processing functionality"""
+
+    @pytest.mark.parametrize("frame,method,expected_valid,err_substr", [
+        pytest.param('valid_events_df', 'validate_csv_structure', True, '',
+                     id='structure-valid'),
+        pytest.param('missing_cols_df', 'validate_csv_structure', False,
+                     'Missing required columns', id='structure-missing-columns'),
+        pytest.param('valid_events_df', 'validate_data_quality', True, '',
+                     id='quality-valid'),
+        pytest.param('invalid_event_df', 'validate_data_quality', False,
+                     'Invalid event types', id='quality-invalid-events'),
+    ])
+    def test_validation(self, processor, request, frame, method, expected_valid, err_substr):
+        """Structure and quality validation across valid and invalid frames"""
+        df = request.getfixturevalue(frame)
+        is_valid, errors = getattr(processor, method)(df)
+        assert is_valid == expected_valid
+        if expected_valid:
+            assert len(errors) == 0
+        else:
+            assert len(errors) > 0
+            assert err_substr in errors[0]
     
-    def test_validate_csv_structure_valid(self, db_session):
-        """Test CSV structure validation with valid data"""
-        processor = CSVProcessor(db_session)
-        
-        # Create valid test data
-        test_data = {
-            'timestamp': ['2024-01-01 10:00:00', '2024-01-01 10:01:00'],
-            'person_id': ['person1', 'person2'],
-            'camera_id': ['camera1', 'camera1'],
-            'event_type': ['entry', 'exit']
-        }
-        df = pd.DataFrame(test_data)
-        
-        is_valid, errors = processor.validate_csv_structure(df)
-        assert is_valid
-        assert len(errors) == 0
-    
-    def test_validate_csv_structure_missing_columns(self, db_session):
-        """Test CSV structure validation with missing columns"""
-        processor = CSVProcessor(db_session)
-        
-        # Create invalid test data (missing required columns)
-        test_data = {
-            'timestamp': ['2024-01-01 10:00:00'],
-            'person_id': ['person1']
-            # Missing camera_id and event_type
-        }
-        df = pd.DataFrame(test_data)
-        
-        is_valid, errors = processor.validate_csv_structure(df)
-        assert not is_valid
-        assert len(errors) > 0
-        assert 'Missing required columns' in errors[0]
-    
-    def test_validate_data_quality_valid(self, db_session):
-        """Test data quality validation with valid data"""
-        processor = CSVProcessor(db_session)
-        
-        # Create valid test data
-        test_data = {
-            'timestamp': ['2024-01-01 10:00:00', '2024-01-01 10:01:00'],
-            'person_id': ['person1', 'person2'],
-            'camera_id': ['camera1', 'camera1'],
-            'event_type': ['entry', 'exit']
-        }
-        df = pd.DataFrame(test_data)
-        
-        is_valid, errors = processor.validate_data_quality(df)
-        assert is_valid
-        assert len(errors) == 0
-    
-    def test_validate_data_quality_invalid_events(self, db_session):
-        """Test data quality validation with invalid event types"""
-        processor = CSVProcessor(db_session)
-        
-        # Create test data with invalid event types
-        test_data = {
-            'timestamp': ['2024-01-01 10:00:00', '2024-01-01 10:01:00'],
-            'person_id': ['person1', 'person2'],
-            'camera_id': ['camera1', 'camera1'],
-            'event_type': ['entry', 'invalid_event']
-        }
-        df = pd.DataFrame(test_data)
-        
-        is_valid, errors = processor.validate_data_quality(df)
-        assert not is_valid
-        assert len(errors) > 0
-        assert 'Invalid event types' in errors[0]
-    
-    def test_parse_timestamps(self, db_session):
+    def test_parse_timestamps(self, processor):
         """Test timestamp parsing functionality"""
-        processor = CSVProcessor(db_session)
-        
         # Test data with different timestamp formats
         test_data = {
             'timestamp': ['2024-01-01 10:00:00', '2024-01-01T10:01:00'],
@@ -96,54 +110,60 @@ class TestCSVProcessor:
             'event_type': ['entry', 'exit']
         }
         df = pd.DataFrame(test_data)
-        
-        result_df = processor.parse_timestamps(df)
+
+        # The mixed formats must go through the vectorized ISO8601 parser;
+        # fail if pandas falls back to per-element format inference
+        import warnings
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter("always")
+            result_df = processor.parse_timestamps(df)
+        assert not [w for w in caught
+                    if 'Could not infer format' in str(w.message)]
+
         assert 'timestamp' in result_df.columns
         assert result_df['timestamp'].dtype == 'datetime64[ns]'
 
 class TestDwellTimeEngine:
     """Test dwell time calculation functionality"""
+
+    @pytest.fixture
+    def engine_under_test(self, db_session):
+        # Bound to the per-test transactional session, so function scope
+        return DwellTimeEngine(db_session)
     
-    def test_calculate_dwell_times_no_events(self, db_session):
+    def test_calculate_dwell_times_no_events(self, engine_under_test):
         """Test dwell time calculation with no events"""
-        engine = DwellTimeEngine(db_session)
-        
-        result = engine.calculate_dwell_times()
+        result = engine_under_test.calculate_dwell_times()
         assert result['sessions_processed'] == 0
         assert result['total_dwell_time'] == 0
     
-    def test_calculate_dwell_times_with_events(self, db_session):
+    def test_calculate_dwell_times_with_events(self, engine_under_test, db_session):
         """Test dwell time calculation with valid events"""
-        engine = DwellTimeEngine(db_session)
-        
         # Create test events
         events = [
             CameraEvent(
-                timestamp=datetime(2024, 1, 1, 10, 0, 0),
+                processed_timestamp=datetime(2024, 1, 1, 10, 0, 0),
                 person_id='person1',
                 camera_id='camera1',
                 event_type='entry'
             ),
             CameraEvent(
-                timestamp=datetime(2024, 1, 1, 10, 5, 0),
+                processed_timestamp=datetime(2024, 1, 1, 10, 5, 0),
                 person_id='person1',
                 camera_id='camera1',
                 event_type='exit'
             )
         ]
         
-        for event in events:
-            db_session.add(event)
+        db_session.add_all(events)
         db_session.commit()
-        
-        result = engine.calculate_dwell_times()
+
+        result = engine_under_test.calculate_dwell_times()
         assert result['sessions_processed'] == 1
         assert result['total_dwell_time'] == 300  # 5 minutes = 300 seconds
     
-    def test_get_dwell_time_analytics(self, db_session):
+    def test_get_dwell_time_analytics(self, engine_under_test, db_session):
         """Test dwell time analytics retrieval"""
-        engine = DwellTimeEngine(db_session)
-        
         # Create test sessions
         sessions = [
             PersonSession(
@@ -156,48 +176,47 @@ class TestDwellTimeEngine:
             )
         ]
         
-        for session in sessions:
-            db_session.add(session)
+        db_session.add_all(sessions)
         db_session.commit()
-        
-        result = engine.get_dwell_time_analytics(group_by='person')
+
+        result = engine_under_test.get_dwell_time_analytics(group_by='person')
         assert 'groups' in result
         assert 'summary' in result
 
 class TestAnalyticsService:
     """Test analytics computation functionality"""
+
+    @pytest.fixture
+    def service(self, db_session):
+        # Bound to the per-test transactional session, so function scope
+        return AnalyticsService(db_session)
     
-    def test_calculate_kpi_metrics_no_data(self, db_session):
+    def test_calculate_kpi_metrics_no_data(self, service):
         """Test KPI calculation with no data"""
-        service = AnalyticsService(db_session)
-        
         metrics = service.calculate_kpi_metrics()
         assert metrics['total_unique_visitors'] == 0
         assert metrics['total_events_processed'] == 0
         assert metrics['active_cameras_count'] == 0
     
-    def test_calculate_kpi_metrics_with_data(self, db_session):
+    def test_calculate_kpi_metrics_with_data(self, service, db_session):
         """Test KPI calculation with test data"""
-        service = AnalyticsService(db_session)
-        
         # Create test events
         events = [
             CameraEvent(
-                timestamp=datetime(2024, 1, 1, 10, 0, 0),
+                processed_timestamp=datetime(2024, 1, 1, 10, 0, 0),
                 person_id='person1',
                 camera_id='camera1',
                 event_type='entry'
             ),
             CameraEvent(
-                timestamp=datetime(2024, 1, 1, 10, 5, 0),
+                processed_timestamp=datetime(2024, 1, 1, 10, 5, 0),
                 person_id='person1',
                 camera_id='camera1',
                 event_type='exit'
             )
         ]
         
-        for event in events:
-            db_session.add(event)
+        db_session.add_all(events)
         db_session.commit()
         
         metrics = service.calculate_kpi_metrics()
@@ -205,10 +224,8 @@ class TestAnalyticsService:
         assert metrics['total_events_processed'] == 2
         assert metrics['active_cameras_count'] == 1
     
-    def test_calculate_occupancy_analytics(self, db_session):
+    def test_calculate_occupancy_analytics(self, service, db_session):
         """Test occupancy analytics calculation"""
-        service = AnalyticsService(db_session)
-        
         # Create test sessions
         sessions = [
             PersonSession(
@@ -221,18 +238,15 @@ class TestAnalyticsService:
             )
         ]
         
-        for session in sessions:
-            db_session.add(session)
+        db_session.add_all(sessions)
         db_session.commit()
         
         result = service.calculate_occupancy_analytics(time_period='hour')
         assert 'occupancy_data' in result
         assert 'summary' in result
     
-    def test_calculate_repeat_visitor_stats(self, db_session):
+    def test_calculate_repeat_visitor_stats(self, service, db_session):
         """Test repeat visitor statistics calculation"""
-        service = AnalyticsService(db_session)
-        
         # Create test sessions for same person
         sessions = [
             PersonSession(
@@ -253,8 +267,7 @@ class TestAnalyticsService:
             )
         ]
         
-        for session in sessions:
-            db_session.add(session)
+        db_session.add_all(sessions)
         db_session.commit()
         
         result = service.calculate_repeat_visitor_stats()
@@ -262,15 +275,68 @@ class TestAnalyticsService:
         assert result['repeat_visitors'] == 1
         assert result['repeat_rate'] == 100.0
 
+    def test_comprehensive_payload_cache_round_trip(self, service, db_session):
+        """The real comprehensive payload must survive a cache round trip
+
+        visitor_frequency is keyed by ints; serialization must stringify
+        them (as the baseline json.dumps did) instead of failing and
+        silently disabling the whole caching layer.
+        """
+        sessions = [
+            PersonSession(
+                session_id='session1',
+                person_id='person1',
+                camera_id='camera1',
+                entry_time=datetime(2024, 1, 1, 10, 0, 0),
+                exit_time=datetime(2024, 1, 1, 10, 5, 0),
+                dwell_duration=300
+            ),
+            PersonSession(
+                session_id='session2',
+                person_id='person1',
+                camera_id='camera1',
+                entry_time=datetime(2024, 1, 2, 10, 0, 0),
+                exit_time=datetime(2024, 1, 2, 10, 5, 0),
+                dwell_duration=300
+            )
+        ]
+
+        db_session.add_all(sessions)
+        db_session.commit()
+
+        payload = service.get_comprehensive_analytics()
+        frequency = payload['repeat_visitor_stats']['visitor_frequency']
+        assert frequency  # int-keyed, the case that broke orjson
+
+        cached = service.get_cached_analytics(
+            service._comprehensive_cache_key(None, None))
+        assert cached is not None
+        assert cached['kpi_metrics'] == payload['kpi_metrics']
+        assert cached['repeat_visitor_stats']['visitor_frequency'] == {
+            str(k): v for k, v in frequency.items()
+        }
+
+@pytest.fixture(scope="session", autouse=True)
+def _schema():
+    """Create the schema once for the whole test session"""
+    Base.metadata.create_all(bind=engine)
+
 @pytest.fixture
 def db_session():
-    """Create a test database session"""
-    # This would need to be configured based on your test setup
-    # For now, we'll use a mock session
-    session = Mock()
-    session.query.return_value.filter.return_value.all.return_value = []
-    session.query.return_value.with_entities.return_value.scalar.return_value = 0
-    session.query.return_value.count.return_value = 0
-    session.add = Mock()
-    session.commit = Mock()
-    return session 
\ No newline at end of file
+    """Yield a real session wrapped in a transaction that is rolled back.
+
+    The services under test run their actual SQL against in-memory SQLite;
+    commits inside a test land on savepoints, so teardown is one rollback.
+    """
+    # Memoized analytics keyed on session identity could alias across tests
+    # when ids are reused, so start each test on a fresh memo version
+    invalidate_analytics_memo()
+    connection = engine.connect()
+    transaction = connection.begin()
+    db = TestingSessionLocal(bind=connection, join_transaction_mode="create_savepoint")
+    try:
+        yield db
+    finally:
+        db.close()
+        transaction.rollback()
+        connection.close() 
\ No newline at end of file
@@ -2,84 +2,139 @@
 Unit tests for waiting time analytics endpoint
 """
 
+import numpy as np
 import pytest
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker
-from datetime import datetime, timedelta
+from sqlalchemy.pool import StaticPool
+from datetime import datetime
 
 from app.main import app
 from app.core.database import get_db, Base
 from app.models.camera_events import CameraEvent
 
-# Test database setup
-SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
-engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+# Test database setup: a single in-memory database shared through a
+# StaticPool, so tests never touch the filesystem
+SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
+engine = create_engine(
+    SQLALCHEMY_DATABASE_URL,
+    connect_args={"check_same_thread": False},
+    poolclass=StaticPool,
+)
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
-def override_get_db():
-    try:
-        db = TestingSessionLocal()
-        yield db
-    finally:
-        db.close()
+# pysqlite ends transactions on its own, which breaks SAVEPOINTs; take
+# over transaction control so the outer per-test rollback really undoes
+# everything committed inside the test
+@event.listens_for(engine, "connect")
+def _sqlite_connect(dbapi_connection, connection_record):
+    dbapi_connection.isolation_level = None
+
+@event.listens_for(engine, "begin")
+def _sqlite_begin(conn):
+    conn.exec_driver_sql("BEGIN")
 
-app.dependency_overrides[get_db] = override_get_db
+@pytest.fixture(scope="session", autouse=True)
+def _schema():
+    """Create the schema once for the whole test session"""
+    Base.metadata.create_all(bind=engine)
 
 @pytest.fixture(scope="function")
 def db_session():
-    """Create a fresh database session for each test"""
-    Base.metadata.create_all(bind=engine)
-    db = TestingSessionLocal()
+    """Yield a session wrapped in a transaction that is rolled back.
+
+    The session joins an outer connection-level transaction via savepoints,
+    so commits inside a test stay invisible outside it and teardown is a
+    single rollback instead of drop_all. The API sees the same session
+    through the dependency override.
+    """
+    connection = engine.connect()
+    transaction = connection.begin()
+    db = TestingSessionLocal(bind=connection, join_transaction_mode="create_savepoint")
+
+    def _override_get_db():
+        yield db
+
+    app.dependency_overrides[get_db] = _override_get_db
     try:
         yield db
     finally:
+        app.dependency_overrides.pop(get_db, None)
         db.close()
-        Base.metadata.drop_all(bind=engine)
+        transaction.rollback()
+        connection.close()
 
-@pytest.fixture
-def client():
-    """Create a test client"""
+@pytest.fixture(scope="session")
+def _test_client():
+    """Build the ASGI test client once; transport setup is not per-test work"""
     return TestClient(app)
 
 @pytest.fixture
-def sample_camera_events(db_session):
-    """Create sample camera events for testing"""
-    events = []
-    
-    # Create events with dwell_time > 10 minutes (600 seconds)
-    base_time = datetime(2024, 1, 1, 10, 0, 0)
-    
-    for i in range(5):
-        event = CameraEvent(
-            person_id=f"person_{i}",
-            event_type="appearance",
-            camera_id=f"camera_{i % 2}",
-            camera_description=f"Camera {i % 2}",
-            camera_group=f"Group {i % 2}",
-            dwell_time=700 + i * 50,  # All > 600 seconds
-            utc_time_started_readable=base_time + timedelta(hours=i),
-            retain=True
-        )
-        events.append(event)
-    
-    # Create events with dwell_time < 10 minutes (should be filtered out)
-    for i in range(3):
-        event = CameraEvent(
-            person_id=f"short_person_{i}",
-            event_type="appearance",
-            camera_id=f"camera_{i}",
-            camera_description=f"Camera {i}",
-            camera_group=f"Group {i}",
-            dwell_time=300 + i * 50,  # All < 600 seconds
-            utc_time_started_readable=base_time + timedelta(hours=i),
-            retain=True
-        )
-        events.append(event)
-    
-    db_session.add_all(events)
-    db_session.commit()
-    return events
+def client(_test_client, db_session):
+    """Test client bound to the per-test database session.
+
+    The TestClient itself is session-scoped; depending on db_session here
+    just guarantees the get_db override is installed before any request.
+    """
+    return _test_client
+
+@pytest.fixture(scope="module")
+def sample_camera_events(_schema):
+    """Seed sample camera events once per module.
+
+    The rows are inserted outside the per-test transaction, so every test
+    sees them without paying a re-insert; tests never modify them (in-test
+    writes land on savepoints that roll back), and teardown clears the
+    table for the next module.
+    """
+    # Dwell and timestamp columns computed as arrays, then zipped into the
+    # dict rows the bulk insert takes
+    base_time = np.datetime64('2024-01-01T10:00:00')
+
+    # Events with dwell_time > 10 minutes (600 seconds)
+    long_idx = np.arange(5)
+    long_dwell = 700 + long_idx * 50  # All > 600 seconds
+    long_times = base_time + long_idx.astype('timedelta64[h]')
+    long_events = [
+        {
+            "person_id": f"person_{i}",
+            "event_type": "appearance",
+            "camera_id": f"camera_{i % 2}",
+            "camera_description": f"Camera {i % 2}",
+            "camera_group": f"Group {i % 2}",
+            "dwell_time": int(dwell),
+            "utc_time_started_readable": ts.astype(datetime),
+            "retain": True,
+        }
+        for i, dwell, ts in zip(long_idx, long_dwell, long_times)
+    ]
+
+    # Events with dwell_time < 10 minutes (should be filtered out)
+    short_idx = np.arange(3)
+    short_dwell = 300 + short_idx * 50  # All < 600 seconds
+    short_times = base_time + short_idx.astype('timedelta64[h]')
+    short_events = [
+        {
+            "person_id": f"short_person_{i}",
+            "event_type": "appearance",
+            "camera_id": f"camera_{i}",
+            "camera_description": f"Camera {i}",
+            "camera_group": f"Group {i}",
+            "dwell_time": int(dwell),
+            "utc_time_started_readable": ts.astype(datetime),
+            "retain": True,
+        }
+        for i, dwell, ts in zip(short_idx, short_dwell, short_times)
+    ]
+
+    # One bulk insert instead of eight tracked ORM instances
+    rows = long_events + short_events
+    with engine.begin() as connection:
+        connection.execute(CameraEvent.__table__.insert(), rows)
+    yield rows
+    with engine.begin() as connection:
+        connection.execute(CameraEvent.__table__.delete())
 
 def test_waiting_time_analytics_basic(client, sample_camera_events):
     """Test basic waiting time analytics endpoint"""